@@ -0,0 +1,236 @@
+"""Нагрузочный прогон игрового цикла по WebSocket.
+
+Поднимает приложение (main9_with_bd.py) в отдельном процессе с одним воркером,
+подключает N игроков и M зрителей, нажимает /admin/start и /admin/next,
+после каждого вопроса устраивает залп ответов и печатает JSON с результатами:
+время доставки до последнего клиента (p50/p99), скорость записи ответов
+и число запросов к БД на действие.
+
+    python bench_ws.py --players 500 --spectators 50 --rounds 20 --out bench.json
+
+По умолчанию используется SQLite-файл (pip install -r requirements-dev.txt), для прогона
+на Postgres передайте --database-url postgresql+asyncpg://...
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from bisect import bisect_left
+
+import httpx
+import websockets
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BENCH_DB = os.path.join(BENCH_DIR, "bench.db")
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summary_ms(values):
+    return {
+        "samples": len(values),
+        "p50_ms": round(percentile(values, 50) * 1000, 2) if values else None,
+        "p99_ms": round(percentile(values, 99) * 1000, 2) if values else None,
+        "max_ms": round(max(values) * 1000, 2) if values else None,
+    }
+
+
+class Client:
+    """Один подключённый игрок или зритель: запоминает время каждого сообщения."""
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.received = []   # [время получения]
+        self.reader = asyncio.create_task(self._read())
+
+    async def _read(self):
+        try:
+            async for message in self.ws:
+                # heartbeat не считается доставкой и требует ответа
+                if '"type": "ping"' in message:
+                    await self.ws.send(json.dumps({"type": "pong"}))
+                    continue
+                self.received.append(time.perf_counter())
+        except websockets.ConnectionClosed:
+            pass
+
+    def first_after(self, moment):
+        index = bisect_left(self.received, moment)
+        return self.received[index] if index < len(self.received) else None
+
+
+async def connect_clients(url, count, concurrency, on_connect=None):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def connect(index):
+        async with semaphore:
+            ws = await websockets.connect(url, max_size=None, open_timeout=30)
+            if on_connect:
+                await on_connect(ws, index)
+            return Client(ws)
+
+    return await asyncio.gather(*(connect(i) for i in range(count)))
+
+
+async def wait_delivery(clients, moment, timeout):
+    # Ждём, пока каждый клиент получит хотя бы одно сообщение после moment
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        firsts = [client.first_after(moment) for client in clients]
+        if all(first is not None for first in firsts):
+            return [first - moment for first in firsts]
+        await asyncio.sleep(0.005)
+    raise TimeoutError("не все клиенты получили сообщение")
+
+
+async def db_queries(http):
+    return (await http.get("/admin/stats")).json()["db_queries"]
+
+
+async def timed_action(http, clients, path, timeout):
+    queries_before = await db_queries(http)
+    moment = time.perf_counter()
+    await http.post(path)
+    delays = await wait_delivery(clients, moment, timeout)
+    queries = await db_queries(http) - queries_before
+    return delays, queries
+
+
+async def run(args, base_url):
+    ws_url = base_url.replace("http://", "ws://")
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as http:
+        questions = [
+            {"section": f"Раздел {s + 1}", "text": f"Вопрос {s + 1}.{q + 1}"}
+            for s in range(args.sections)
+            for q in range(args.rounds)
+        ]
+        await http.post("/admin/questions", json=questions)
+
+        async def register(ws, index):
+            await ws.send(json.dumps({"type": "set_name", "name": f"bench-{index}"}))
+            await ws.recv()
+
+        started = time.perf_counter()
+        players = await connect_clients(f"{ws_url}/ws/player", args.players, args.connect_concurrency, register)
+        spectators = await connect_clients(f"{ws_url}/ws/spectator", args.spectators, args.connect_concurrency)
+        connect_seconds = time.perf_counter() - started
+        clients = players + spectators
+        await asyncio.sleep(0.5)
+
+        start_delays, start_queries = await timed_action(http, clients, "/admin/start", args.timeout)
+
+        round_last, all_deliveries, next_queries = [], [], []
+        answer_rates, burst_queries = [], []
+        for _ in range(args.rounds):
+            delays, queries = await timed_action(http, clients, "/admin/next", args.timeout)
+            round_last.append(max(delays))
+            all_deliveries.extend(delays)
+            next_queries.append(queries)
+
+            # Залп ответов: считаем, сколько ответов в секунду дошло до БД
+            stats = (await http.get("/admin/stats")).json()
+            written_before = stats["answers"]["rows_written"]
+            queries_before = stats["db_queries"]
+            moment = time.perf_counter()
+            await asyncio.gather(*(
+                player.ws.send(json.dumps({"type": "answer", "answer": "ответ"})) for player in players
+            ))
+            deadline = moment + args.timeout
+            while time.perf_counter() < deadline:
+                stats = (await http.get("/admin/stats")).json()
+                if stats["answers"]["rows_written"] - written_before >= len(players):
+                    break
+                await asyncio.sleep(0.01)
+            elapsed = time.perf_counter() - moment
+            written = stats["answers"]["rows_written"] - written_before
+            answer_rates.append(written / elapsed if elapsed else 0.0)
+            burst_queries.append(stats["db_queries"] - queries_before)
+
+        await http.post("/admin/stop")
+        for client in clients:
+            await client.ws.close()
+
+    return {
+        "config": {
+            "players": args.players,
+            "spectators": args.spectators,
+            "rounds": args.rounds,
+            "database_url": args.database_url,
+        },
+        "connect_seconds": round(connect_seconds, 3),
+        "start": {**summary_ms(start_delays), "db_queries": start_queries},
+        "next_time_to_last_delivery": summary_ms(round_last),
+        "next_per_client_delivery": summary_ms(all_deliveries),
+        "next_db_queries_avg": statistics.mean(next_queries) if next_queries else None,
+        "answers_per_sec": {
+            "p50": round(percentile(answer_rates, 50), 1) if answer_rates else None,
+            "min": round(min(answer_rates), 1) if answer_rates else None,
+        },
+        "answer_burst_db_queries_avg": statistics.mean(burst_queries) if burst_queries else None,
+    }
+
+
+async def wait_server(base_url, process, timeout=30):
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as http:
+        while time.perf_counter() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError("сервер завершился при запуске")
+            try:
+                await http.get("/admin/stats")
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise TimeoutError("сервер не поднялся")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=200)
+    parser.add_argument("--spectators", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--sections", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--database-url", default=f"sqlite+aiosqlite:///{BENCH_DB}")
+    parser.add_argument("--connect-concurrency", type=int, default=100)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--out", help="куда записать JSON (по умолчанию stdout)")
+    args = parser.parse_args()
+
+    if args.database_url == f"sqlite+aiosqlite:///{BENCH_DB}" and os.path.exists(BENCH_DB):
+        os.remove(BENCH_DB)
+
+    env = dict(os.environ, DATABASE_URL=args.database_url, QUIZ_BUS="memory")
+    base_url = f"http://127.0.0.1:{args.port}"
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main9_with_bd:app", "--port", str(args.port), "--log-level", "warning"],
+        env=env,
+        cwd=BENCH_DIR,
+    )
+    try:
+        asyncio.run(wait_server(base_url, process))
+        result = asyncio.run(run(args, base_url))
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+    output = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+import main9_with_bd as quiz
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'quiz.db'}")
+    monkeypatch.setattr(quiz, "engine", engine)
+    monkeypatch.setattr(quiz, "async_session", sessionmaker(engine, expire_on_commit=False, class_=AsyncSession))
+    monkeypatch.setattr(quiz, "question_matchers", {1: quiz.AnswerMatcher(["Пушкин"])})
+    monkeypatch.setattr(quiz, "question_awards", {})
+    monkeypatch.setattr(quiz.bus, "publish_soon", lambda event: None)
+    yield engine
+    asyncio.run(engine.dispose())
+
+
+def _answer():
+    return {
+        "user_id": 1, "question_id": 1, "answer_text": "пушкин",
+        "answered_at": datetime.now(timezone.utc), "latency_ms": 100,
+    }
+
+
+async def _answer_on_two_workers(engine, game_ids):
+    await quiz.migrate_db()
+    async with engine.begin() as conn:
+        await conn.execute(insert(quiz.User).values(id=1, room=quiz.DEFAULT_ROOM, name="Аня", score=0))
+        await conn.execute(insert(quiz.Question).values(id=1, section="Раздел", text="Вопрос", true_answer="Пушкин"))
+    for game_id in game_ids:
+        # Переподключение к другому воркеру: у него своя память о начисленных баллах
+        quiz.question_awards.clear()
+        writer = quiz.AnswerWriter()
+        writer.submit(_answer(), quiz.DEFAULT_ROOM, game_id)
+        await writer.flush()
+    async with engine.connect() as conn:
+        score = (await conn.execute(select(quiz.User.score))).scalar_one()
+        answers = (await conn.execute(select(quiz.Answer.is_correct))).scalars().all()
+    return score, answers
+
+
+def test_award_once_per_game_across_workers(engine):
+    score, answers = asyncio.run(_answer_on_two_workers(engine, ["game-1", "game-1"]))
+
+    assert answers == [True, True]
+    assert score == quiz.AUTO_GRADE_POINTS
+
+
+def test_award_again_in_new_game(engine):
+    score, _ = asyncio.run(_answer_on_two_workers(engine, ["game-1", "game-2"]))
+
+    assert score == 2 * quiz.AUTO_GRADE_POINTS
@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+from sqlalchemy import inspect, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+import main9_with_bd as quiz
+
+# Схема до первой миграции: таблицы в том виде, в каком их создавал init_db
+BASELINE_SCHEMA = [
+    "CREATE TABLE users (id INTEGER PRIMARY KEY, name VARCHAR, score INTEGER)",
+    "CREATE UNIQUE INDEX ix_users_name ON users (name)",
+    "CREATE TABLE questions (id INTEGER PRIMARY KEY, section VARCHAR, text TEXT)",
+    "CREATE TABLE answers (id INTEGER PRIMARY KEY, user_id INTEGER REFERENCES users (id), "
+    "question_id INTEGER REFERENCES questions (id), answer_text VARCHAR, answered_at VARCHAR)",
+    "INSERT INTO users (id, name, score) VALUES (1, 'Аня', 3)",
+    "INSERT INTO questions (id, section, text) VALUES (1, 'Раздел', 'Вопрос')",
+    "INSERT INTO answers (id, user_id, question_id, answer_text, answered_at) VALUES (1, 1, 1, 'ответ', '12:34:56')",
+]
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'quiz.db'}")
+    monkeypatch.setattr(quiz, "engine", engine)
+    yield engine
+    asyncio.run(engine.dispose())
+
+
+async def _upgrade_from_baseline(engine):
+    async with engine.begin() as conn:
+        for statement in BASELINE_SCHEMA:
+            await conn.execute(text(statement))
+    await quiz.migrate_db()
+    # Повторный запуск видит актуальную версию и ничего не делает
+    await quiz.migrate_db()
+    async with engine.connect() as conn:
+        version = await quiz._schema_version(conn)
+        indexes = await conn.run_sync(
+            lambda sync_conn: {
+                index["name"]
+                for table in ("users", "questions", "answers")
+                for index in inspect(sync_conn).get_indexes(table)
+            }
+        )
+        user = (await conn.execute(text("SELECT room, name, score FROM users"))).one()
+        answer = (await conn.execute(text("SELECT answered_at, is_correct, latency_ms FROM answers"))).one()
+    return version, indexes, user, answer
+
+
+def test_upgrade_from_baseline_schema(engine):
+    version, indexes, user, answer = asyncio.run(_upgrade_from_baseline(engine))
+
+    assert version == quiz.SCHEMA_VERSION
+    expected = {
+        index.name
+        for table in (quiz.User.__table__, quiz.Question.__table__, quiz.Answer.__table__)
+        for index in table.indexes
+    }
+    assert expected <= indexes
+    assert tuple(user) == (quiz.DEFAULT_ROOM, "Аня", 3)
+    assert answer[0].endswith("12:34:56.000000")
+    assert answer[1] is None and answer[2] is None